@@ -1,54 +1,79 @@
+import threading
 import streamlit as st
 import numpy as np
-from scipy.signal import find_peaks, butter, filtfilt
-from scipy.integrate import odeint
-import requests
+from scipy.signal import find_peaks
 from datetime import datetime
-from PIL import Image
-from io import BytesIO
-import cv2
-import pytesseract
+from data_fetch import get_tomsk_schumann_power_ocr
 
 st.title("SunWolf Sentinel Forecast")
 
+# Import the OCR/plotting stack in the background while the page renders (once per process)
+@st.cache_resource
+def prewarm_imports():
+    def load():
+        import cv2, pytesseract, requests  # noqa: F401
+        from PIL import Image  # noqa: F401
+        from matplotlib.figure import Figure  # noqa: F401
+    threading.Thread(target=load, daemon=True).start()
+
+prewarm_imports()
+
 # Inputs
 proxies = [st.slider(f"Proxy {i+1}", 0.0, 1.0, 0.75) for i in range(2)]
 kp = st.number_input("Kp Index", value=2.0)
 schumann = st.number_input("Schumann Power", value=20.0)
 start = st.text_input("Start Date", datetime.now().strftime("%Y-%m-%d"))
 
-# Schumann OCR
-def fetch_schumann():
-    try:
-        r = requests.get("https://sosrff.tsu.ru/new/sch.png", timeout=15)
-        img = Image.open(BytesIO(r.content))
-        img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-        h, w = gray.shape
-        crop = gray[int(h*0.65):int(h*0.92), int(w*0.68):int(w*0.98)]
-        crop = cv2.convertScaleAbs(crop, alpha=2.0, beta=0)
-        text = pytesseract.image_to_string(crop, config='--psm 7 digits')
-        nums = [int(s) for s in text.split() if s.isdigit() and 5 < int(s) < 200]
-        return nums[0] if nums else 20.0
-    except:
-        return 20.0
-
-# Simple forecast model (expand as needed)
-if st.button("Run Forecast"):
-    try:
-        p = np.mean(proxies)
-        sch = fetch_schumann()
-        t = np.linspace(0, 10, 100)
-        sig = np.exp(0.1 * t) * p * (1 + kp/9.0 + sch/20.0)
-        fore = np.cumsum(sig)
-        peaks, _ = find_peaks(fore, prominence=0.5)
-        fig, ax = plt.subplots()
-        ax.plot(t, fore, label='Forecast')
-        ax.scatter(t[peaks], fore[peaks], color='red', label='Peaks')
-        ax.legend()
-        st.pyplot(fig)
-        st.write(f"Peaks at: {', '.join([f'{d:.1f}' for d in t[peaks]])} days" if peaks.size else "No peaks")
-        st.write(f"Schumann OCR: {sch:.1f}")
-        st.success("Forecast complete!")
-    except Exception as e:
-        st.error(f"Error: {str(e)}")
+# Pooled HTTP session kept across reruns and sessions
+@st.cache_resource
+def http_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    s = requests.Session()
+    # Same policy as the dashboard SESSION: no read-timeout retries
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                                    max_retries=Retry(total=None, connect=2, read=0, status=2,
+                                                      status_forcelist=[502, 503, 504],
+                                                      backoff_factor=0.3)))
+    return s
+
+# Simple forecast model (expand as needed); cached so reruns with the same inputs skip it
+@st.cache_data(max_entries=32)
+def run_forecast(p, kp, sch):
+    t = np.linspace(0, 10, 100)
+    sig = np.exp(0.1 * t) * p * (1 + kp/9.0 + sch/20.0)
+    fore = np.cumsum(sig)
+    peaks, _ = find_peaks(fore, prominence=0.5)
+    return t, fore, peaks
+
+# Rendered once per input set; the PNG bytes are cached, never a shared Figure
+@st.cache_data(max_entries=32)
+def forecast_png(p, kp, sch):
+    from io import BytesIO
+    from matplotlib.figure import Figure
+    t, fore, peaks = run_forecast(p, kp, sch)
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot(t, fore, label='Forecast')
+    ax.scatter(t[peaks], fore[peaks], color='red', label='Peaks')
+    ax.legend()
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+# Only this panel reruns when the button is pressed, not the whole script
+@st.fragment
+def forecast_panel(p, kp):
+    if st.button("Run Forecast"):
+        try:
+            sch = get_tomsk_schumann_power_ocr(http_session())
+            t, fore, peaks = run_forecast(p, kp, sch)
+            st.image(forecast_png(p, kp, sch))
+            st.write(f"Peaks at: {', '.join([f'{d:.1f}' for d in t[peaks]])} days" if peaks.size else "No peaks")
+            st.write(f"Schumann OCR: {sch:.1f}")
+            st.success("Forecast complete!")
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+
+forecast_panel(float(np.mean(proxies)), kp)
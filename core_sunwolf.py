@@ -1,7 +1,7 @@
 import pandas as pd, requests, numpy as np
 
 def compute_sunwolf(cf_df, vulc_df, kp_index):
-    shallow_ratio = lambda df: (df['depth'] < 3).mean()
+    shallow_ratio = lambda df: float((df['depth'].to_numpy() < 3).mean()) if len(df) else 0
     eii = 0.5 * (shallow_ratio(cf_df) + shallow_ratio(vulc_df)) * (1 + min(kp_index/7, 0.25))
     rpam = "ELEVATED" if eii > 0.55 else "NORMAL"
     psi_s = round(1 + min(kp_index/28, 0.25), 3)
@@ -1,14 +1,20 @@
-import cv2
-import pytesseract
-from PIL import Image
 from io import BytesIO
 import numpy as np
 
-def get_tomsk_schumann_power_ocr():
-    """Download Tomsk live chart, crop, OCR amplitude of mode 1."""
+def get_tomsk_schumann_power_ocr(session=None):
+    """Download Tomsk live chart, crop, OCR amplitude of mode 1.
+
+    Pass a pooled `requests.Session` to reuse connections across calls.
+    """
+    # OpenCV / Tesseract / PIL are heavy; import on first call, not at app start
+    import cv2
+    import pytesseract
+    import requests
+    from PIL import Image
+
     url = "https://sosrff.tsu.ru/new/sch.png"  # Live amplitude chart
     try:
-        resp = requests.get(url, timeout=15)
+        resp = (session or requests).get(url, timeout=15)
         resp.raise_for_status()
         img = Image.open(BytesIO(resp.content))
         img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
@@ -17,13 +23,13 @@ def get_tomsk_schumann_power_ocr():
         # Crop to approximate recent amplitude region (adjust these coords if layout changes)
         # Typical: bottom-right shows latest values
         height, width = gray.shape
-        crop = gray[int(height * 0.7):int(height * 0.95), int(width * 0.6):int(width * 0.95)]
+        crop = gray[int(height * 0.65):int(height * 0.92), int(width * 0.68):int(width * 0.98)]
 
         # Enhance contrast for better OCR
-        crop = cv2.convertScaleAbs(crop, alpha=1.5, beta=0)
+        crop = cv2.convertScaleAbs(crop, alpha=2.0, beta=0)
 
-        # OCR with digit config
-        text = pytesseract.image_to_string(crop, config='--psm 6 digits')
+        # OCR the crop as a single line of digits
+        text = pytesseract.image_to_string(crop, config='--psm 7 digits')
         # Clean and take first reasonable number (usually mode 1 power)
         numbers = [int(s) for s in text.split() if s.isdigit() and 5 < int(s) < 200]
         power = numbers[0] if numbers else 20.0  # Default fallback
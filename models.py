@@ -1,6 +1,6 @@
 import numpy as np
 from scipy.integrate import odeint
-from astropy.coordinates import get_body_barycentric
+from astropy.coordinates import get_body, get_body_barycentric
 from astropy.time import Time
 import astropy.units as u
 
@@ -24,47 +24,37 @@ def duffing_oscillator(y, t, gamma, alpha, beta, tau, omega, folded_proxy):
     dvdt = -gamma * v - alpha * x - beta * x**3 - 0.01 * v**2 + tau * np.sin(omega * t) * folded_proxy
     return [dxdt, dvdt]
 
+BODY_MASSES = {
+    'moon': 7.342e22 * u.kg,
+    'mars': 6.417e23 * u.kg,
+    'saturn': 5.683e26 * u.kg,
+    'neptune': 1.024e26 * u.kg,
+}
+
 def compute_tidal_factor(t_days, start_date, bodies=['moon', 'mars', 'saturn', 'neptune']):
-    tidal_values = []
-    for day in t_days:
-        t_astropy = Time(start_date) + day * u.day
-        total_tidal = 0
-        earth_pos = get_body_barycentric('earth', t_astropy)
-        for body in bodies:
-            body_pos = get_body_barycentric(body, t_astropy)
-            d = np.linalg.norm((body_pos - earth_pos).xyz.to(u.au).value) * u.au
-            if body == 'moon':
-                M = 7.342e22 * u.kg
-            elif body == 'mars':
-                M = 6.417e23 * u.kg
-            elif body == 'saturn':
-                M = 5.683e26 * u.kg
-            elif body == 'neptune':
-                M = 1.024e26 * u.kg
-            else:
-                continue
-            G = 6.67430e-11 * u.m**3 / u.kg / u.s**2
-            R_earth = 6371e3 * u.m
-            tidal = 2 * G * M * R_earth / d**3
-            total_tidal += tidal.decompose().value
-        tidal_values.append(total_tidal)
-    tidal_norm = np.array(tidal_values) / 1e-6 if np.max(tidal_values) > 0 else np.ones(len(t_days))
+    times = Time(start_date) + np.asarray(t_days) * u.day
+    earth_pos = get_body_barycentric('earth', times)
+    G = 6.67430e-11 * u.m**3 / u.kg / u.s**2
+    R_earth = 6371e3 * u.m
+    total_tidal = np.zeros(len(times))
+    for body in bodies:
+        if body not in BODY_MASSES:
+            continue
+        d = (get_body_barycentric(body, times) - earth_pos).norm()  # one distance per step
+        total_tidal += (2 * G * BODY_MASSES[body] * R_earth / d**3).decompose().value
+    tidal_norm = total_tidal / 1e-6 if np.max(total_tidal) > 0 else np.ones(len(t_days))
     return tidal_norm
 
 def detect_alignments(t_days, start_date, base_body='moon', planets=['mars', 'jupiter', 'saturn', 'uranus'], aspects=[0, 60, 90, 120]):
-    alignment_factors = np.ones(len(t_days))
-    for i, day in enumerate(t_days):
-        t_astropy = Time(start_date) + day * u.day
-        base_pos = get_body(base_body, t_astropy).icrs
-        boost = 1.0
-        for planet in planets:
-            planet_pos = get_body(planet, t_astropy).icrs
-            sep = base_pos.separation(planet_pos).deg
-            for aspect in aspects:
-                if abs(sep - aspect) < 1.0:
-                    boost += 0.2
-        alignment_factors[i] = boost
-    return alignment_factors
+    times = Time(start_date) + np.asarray(t_days) * u.day
+    base_pos = get_body(base_body, times).icrs
+    # Separation of each planet from the base body at every step: shape (planets, steps)
+    seps = np.empty((len(planets), len(times)))
+    for i, planet in enumerate(planets):
+        seps[i] = base_pos.separation(get_body(planet, times).icrs).deg
+    # Every planet/aspect pair within 1 degree adds 0.2 to that step's boost
+    hits = np.abs(seps[..., np.newaxis] - np.asarray(aspects)) < 1.0
+    return 1.0 + 0.2 * hits.sum(axis=(0, 2))
 
 def sentinel_forecast(proxies, geomag_kp=0, schumann_power=20.0, historical_matches=None, domain=None, time_steps=100, start_date=None, ionex_text=None):
     t = np.linspace(0, 10, time_steps)
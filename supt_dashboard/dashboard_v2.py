@@ -1,54 +1,336 @@
+import functools
+import os
+import threading
+import time
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 import requests
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from core_sunwolf import compute_sunwolf
+
+try:
+    from orjson import loads as json_loads  # faster decode of the NOAA JSON
+except ImportError:
+    from json import loads as json_loads
 
 # Existing code...
 # (Assuming you already have your NOAA Solar Wind + USGS functions defined above)
 
 # === NEW: SUPT SunWolf Integration ===
 
-def fetch_ingv(latmin, latmax, lonmin, lonmax):
-    """Fetch recent Campi Flegrei / Vulcano events."""
+# Shared pooled session: keeps TLS connections to INGV / NOAA alive between refreshes
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8, pool_maxsize=8,
+    # Retry refused connections and 5xx only; a read timeout is not retried so the
+    # worst case stays one timeout per request
+    max_retries=Retry(total=None, connect=2, read=0, status=2,
+                      status_forcelist=[502, 503, 504], backoff_factor=0.3)))
+
+class CircuitBreaker:
+    """Per-host breaker: opens after `threshold` consecutive failures, with growing windows.
+
+    Once a window has passed, one half-open probe is let through; its failure
+    re-opens the circuit for the next window, its success closes it.
+    """
+
+    def __init__(self, threshold=3, windows=(120, 600, 1800)):
+        self.threshold = threshold
+        self.windows = windows
+        self.fail_count = {}
+        self.open_until = {}
+        self.trips = {}
+        self.probing = set()
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        with self._lock:
+            now = time.time()
+            until = self.open_until.get(host)
+            if until is None:
+                return True
+            if now < until:
+                return False
+            # Half-open: admit this caller as the probe, keep the circuit shut for the rest
+            self.open_until[host] = now + self.windows[min(self.trips[host], len(self.windows)) - 1]
+            self.probing.add(host)
+            return True
+
+    def record(self, host, ok):
+        with self._lock:
+            probe = host in self.probing
+            self.probing.discard(host)
+            if ok:
+                self.fail_count[host] = self.trips[host] = 0
+                self.open_until.pop(host, None)
+                return
+            if not probe and time.time() < self.open_until.get(host, 0.0):
+                return  # late failure of a call admitted before the circuit opened
+            self.fail_count[host] = self.fail_count.get(host, 0) + 1
+            if probe or self.fail_count[host] >= self.threshold:
+                trips = self.trips.get(host, 0)
+                self.open_until[host] = time.time() + self.windows[min(trips, len(self.windows) - 1)]
+                self.trips[host] = trips + 1
+                self.fail_count[host] = 0
+
+BREAKER = CircuitBreaker()
+
+def cb_get(url, **kwargs):
+    """SESSION.get guarded by BREAKER; raises immediately while the host's circuit is open."""
+    host = urlsplit(url).netloc
+    if not BREAKER.allow(host):
+        raise requests.ConnectionError(f"circuit open for {host}")
+    r = None
+    try:
+        r = SESSION.get(url, **kwargs)
+        r.raise_for_status()
+    except requests.RequestException:
+        if r is not None:
+            r.close()  # a streamed error body would otherwise hold its pooled connection
+        BREAKER.record(host, ok=False)
+        raise
+    BREAKER.record(host, ok=True)
+    return r
+
+_VALIDATORS = {}
+
+def conditional_get(url, parse, key=None, **kwargs):
+    """cb_get with ETag / Last-Modified revalidation.
+
+    The parsed value of the last 200 response is kept per `key` (default: the URL);
+    a 304 for the same URL returns it without downloading or parsing the body again.
+    """
+    key = key or url
+    prev = _VALIDATORS.get(key)
+    headers = {}
+    if prev and prev["url"] == url:
+        if prev["etag"]:
+            headers["If-None-Match"] = prev["etag"]
+        if prev["last_modified"]:
+            headers["If-Modified-Since"] = prev["last_modified"]
+    with cb_get(url, headers=headers, **kwargs) as r:  # closes streamed responses too
+        if r.status_code == 304 and headers:
+            return prev["value"]
+        value = parse(r)
+    etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+    if etag or last_modified:
+        _VALIDATORS[key] = {"url": url, "etag": etag, "last_modified": last_modified, "value": value}
+    return value
+
+_CACHE = {}
+_REFRESHING = {}
+_REFRESHING_GUARD = threading.Lock()
+
+def swr_cache(ttl, stale_ttl):
+    """Memoize a fetcher per argument tuple with stale-while-revalidate.
+
+    Fresh for `ttl` seconds; up to `stale_ttl` the old value is served while a
+    background thread refreshes it. Callers only block on a cold or expired entry.
+    Exceptions are never cached: they propagate to the caller, or during a
+    background refresh the old value is kept.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args):
+            key = (fn.__name__, args)
+            hit = _CACHE.get(key)
+            age = time.time() - hit[1] if hit else None
+            if hit and age < ttl:
+                return hit[0]
+            if hit and age < stale_ttl:
+                with _REFRESHING_GUARD:
+                    lock = _REFRESHING.setdefault(key, threading.Lock())
+                if lock.acquire(blocking=False):  # one refresh per key at a time
+                    def refresh():
+                        try:
+                            _CACHE[key] = (fn(*args), time.time())
+                        except Exception as e:  # keep serving the old value
+                            print(f"Background refresh of {fn.__name__} failed:", e)
+                        finally:
+                            lock.release()
+                    threading.Thread(target=refresh, daemon=True).start()
+                return hit[0]
+            value = fn(*args)
+            _CACHE[key] = (value, time.time())
+            return value
+        return wrapper
+    return decorator
+
+_INFLIGHT = {}
+_INFLIGHT_GUARD = threading.Lock()
+
+def singleflight(fn):
+    """Collapse concurrent calls with the same arguments into one underlying call."""
+    @functools.wraps(fn)
+    def wrapper(*args):
+        key = (fn.__name__, args)
+        with _INFLIGHT_GUARD:
+            call = _INFLIGHT.get(key)
+            leader = call is None
+            if leader:
+                call = _INFLIGHT[key] = {"done": threading.Event()}
+        if not leader:
+            call["done"].wait()
+            if "error" in call:
+                raise call["error"]
+            return call["value"]
+        try:
+            call["value"] = fn(*args)
+            return call["value"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with _INFLIGHT_GUARD:
+                del _INFLIGHT[key]
+            call["done"].set()
+    return wrapper
+
+CACHE_DIR = Path.home() / ".cache" / "sunwolf"
+
+def disk_cache(ttl, max_age):
+    """Persist a DataFrame fetcher's result as parquet, reused for `ttl` seconds.
+
+    Survives process restarts, so a cold start reads local disk instead of the network.
+    If the fetcher raises, a snapshot younger than `max_age` is served instead;
+    older ones no longer describe the query window and the error propagates.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args):
+            path = CACHE_DIR / f"{fn.__name__}-{'_'.join(map(str, args))}.parquet"
+            try:
+                age = time.time() - path.stat().st_mtime
+            except OSError:
+                age = None
+            if age is not None and age < ttl:
+                try:
+                    return pd.read_parquet(path)
+                except (OSError, ImportError, ValueError):
+                    pass  # unreadable or no parquet engine: fetch instead
+            try:
+                df = fn(*args)
+            except Exception:
+                if age is not None and age < max_age:
+                    try:
+                        return pd.read_parquet(path)
+                    except (OSError, ImportError, ValueError):
+                        pass
+                raise
+            try:
+                CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                # Write aside and rename, so a reader never sees a half-written file
+                tmp = path.with_suffix(f".{os.getpid()}.tmp")
+                df.to_parquet(tmp, compression="zstd", index=False)
+                os.replace(tmp, path)
+            except (OSError, ImportError, ValueError) as e:
+                print("Parquet cache write failed:", e)
+            return df
+        return wrapper
+    return decorator
+
+# FDSN text columns kept from INGV, mapped to the names used below
+INGV_COLUMNS = {"Time": "time", "Latitude": "latitude", "Longitude": "longitude",
+                "Depth/Km": "depth", "Magnitude": "md"}
+
+# Shared empty result for failed fetches; read-only like every cached frame
+EMPTY_EVENTS = pd.DataFrame(columns=["time", "latitude", "longitude", "depth", "md"])
+
+def _parse_ingv(r):
+    if r.status_code == 204:  # FDSN: no events in the window
+        return EMPTY_EVENTS
+    r.raw.decode_content = True  # let urllib3 undo any gzip while pandas reads
+    df = pd.read_csv(r.raw, sep="|", usecols=list(INGV_COLUMNS),
+                     dtype={"Latitude": "float32", "Longitude": "float32",
+                            "Depth/Km": "float32", "Magnitude": "float32"})
+    return df.rename(columns=INGV_COLUMNS).dropna(subset=["depth", "md"])
+
+@swr_cache(ttl=900, stale_ttl=3600)  # 7-day catalog changes slowly
+@singleflight
+@disk_cache(ttl=900, max_age=7 * 86400)  # never older than the query window
+def _fetch_ingv(latmin, latmax, lonmin, lonmax):
+    # Hour-aligned start keeps the URL stable between refreshes; no endtime means "up to now"
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(days=7)
     url = (f"https://webservices.ingv.it/fdsnws/event/1/query?"
-           f"starttime={datetime.utcnow()-timedelta(days=7):%Y-%m-%d}&endtime=now"
+           f"starttime={start:%Y-%m-%dT%H:%M:%S}"
            f"&latmin={latmin}&latmax={latmax}&lonmin={lonmin}&lonmax={lonmax}&format=text")
+    return conditional_get(url, _parse_ingv, key=("ingv", latmin, latmax, lonmin, lonmax),
+                           timeout=15, stream=True)
+
+def fetch_ingv(latmin, latmax, lonmin, lonmax):
+    """Fetch recent Campi Flegrei / Vulcano events."""
+    # Fallback applied outside the caches so a failure is never stored as data
     try:
-        df = pd.read_csv(url, sep="|", comment="#")
-        df.columns = [c.strip().lower() for c in df.columns]
-        df = df.rename(columns={"mag":"md"}).dropna(subset=["depth", "md"])
-        return df
+        return _fetch_ingv(latmin, latmax, lonmin, lonmax)
     except Exception as e:
         print("INGV fetch failed:", e)
-        return pd.DataFrame(columns=["time","latitude","longitude","depth","md"])
+        return EMPTY_EVENTS
+
+@swr_cache(ttl=3 * 3600, stale_ttl=6 * 3600)  # planetary Kp is 3-hourly
+@singleflight
+def _fetch_kp():
+    return conditional_get(
+        "https://services.swpc.noaa.gov/products/noaa-planetary-k-index.json",
+        lambda r: float(json_loads(r.content)[-1][1]), timeout=5)
 
 def fetch_kp():
     """Fetch current planetary K-index from NOAA SWPC."""
     try:
-        data = requests.get(
-            "https://services.swpc.noaa.gov/products/noaa-planetary-k-index.json",
-            timeout=5).json()
-        return float(data[-1][1])
+        return _fetch_kp()
     except Exception:
         return 3.0
 
-def compute_sunwolf(cf_df, vulc_df, kp):
-    """Compute SUPT–SunWolf EII and RPAM metrics."""
-    shallow = lambda df: (df["depth"] < 3).mean() if len(df) else 0
-    cf_sr, vulc_sr = shallow(cf_df), shallow(vulc_df)
-    eii = 0.5 * (cf_sr + vulc_sr) * (1 + min(kp/7, 0.25))
-    rpam = "ELEVATED" if eii > 0.55 else "NORMAL"
-    psi_s = round(1 + min(kp/28, 0.25), 3)
-    return eii, rpam, psi_s
+# Static figure pieces, built once at import (Plotly copies them into each figure)
+RESONANCE_CONTROLS = {
+    "buttons": [
+        {"args": [None, {"frame": {"duration": 150, "redraw": True}, "fromcurrent": True}],
+         "label": "▶️ Play ψₛ Resonance", "method": "animate"},
+        {"args": [[None], {"frame": {"duration": 0}, "mode": "immediate"}],
+         "label": "⏸ Pause", "method": "animate"}
+    ],
+    "direction": "left", "pad": {"r": 10, "t": 70},
+    "showactive": False, "type": "buttons", "x": 0.1, "xanchor": "right", "y": 1.05, "yanchor": "top"
+}
+
+KP_GAUGE = {"axis": {"range": [0, 9]},
+            "bar": {"color": "gold"},
+            "steps": [
+                {"range": [0, 3], "color": "darkblue"},
+                {"range": [3, 6], "color": "orange"},
+                {"range": [6, 9], "color": "red"}]}
+
+@functools.lru_cache(maxsize=16)
+def _resonance_frames(psi_s):
+    """Animation frames for the ψₛ wave, built once per ψₛ value."""
+    import plotly.graph_objects as go
+    t = np.linspace(0, 2*np.pi, 50)
+    x_wave = np.linspace(14.10, 14.15, 50)
+    y_wave = np.linspace(40.79, 40.84, 50)
+    phases = np.linspace(0, 2*np.pi, 20)
+    z_anim = -2 + np.sin(t * (psi_s * 3.14) + phases[:, np.newaxis]) * 0.5  # (frames, points)
+    return tuple(go.Frame(
+        data=[go.Scatter3d(x=x_wave, y=y_wave, z=z,
+                           mode="lines", line=dict(color="gold", width=6))],
+        name=str(phase)
+    ) for phase, z in zip(phases, z_anim))
 
 def build_dashboard():
     """Extended dashboard integrating SUPT SunWolf model + solar resonance."""
-    # Fetch seismic + geomagnetic data
-    cf_df = fetch_ingv(40.79, 40.84, 14.10, 14.15)   # Campi Flegrei
-    vulc_df = fetch_ingv(38.38, 38.47, 14.90, 15.05) # Vulcano
-    kp = fetch_kp()
+    import plotly.graph_objects as go  # deferred: the fetchers don't need Plotly
+    # Fetch seismic + geomagnetic data (independent requests, run in parallel)
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_cf = ex.submit(fetch_ingv, 40.79, 40.84, 14.10, 14.15)    # Campi Flegrei
+        f_vulc = ex.submit(fetch_ingv, 38.38, 38.47, 14.90, 15.05)  # Vulcano
+        f_kp = ex.submit(fetch_kp)
+        cf_df, vulc_df, kp = f_cf.result(), f_vulc.result(), f_kp.result()
 
-    eii, rpam, psi_s = compute_sunwolf(cf_df, vulc_df, kp)
+    metrics = compute_sunwolf(cf_df, vulc_df, kp)
+    eii, rpam, psi_s = metrics["EII"], metrics["RPAM"], metrics["PSI_SCALE"]
 
     # === PLOTLY DASHBOARD ===
     fig = go.Figure()
@@ -79,7 +361,6 @@ def build_dashboard():
             ))
 
     # === SOLAR RESONANCE LAYER ===
-    import numpy as np
     t = np.linspace(0, 2*np.pi, 50)
     amplitude = np.sin(t * (psi_s * 3.14)) * 0.5
     z_wave = -2 + amplitude  # anchored around 2 km depth
@@ -95,27 +376,8 @@ def build_dashboard():
     ))
 
     # === ANIMATION FRAMES ===
-    frames = []
-    for phase in np.linspace(0, 2*np.pi, 20):
-        z_anim = -2 + np.sin(t * (psi_s * 3.14) + phase) * 0.5
-        frames.append(go.Frame(
-            data=[go.Scatter3d(x=x_wave, y=y_wave, z=z_anim,
-                               mode="lines", line=dict(color="gold", width=6))],
-            name=str(phase)
-        ))
-    fig.frames = frames
-    fig.update_layout(
-        updatemenus=[{
-            "buttons": [
-                {"args": [None, {"frame": {"duration": 150, "redraw": True}, "fromcurrent": True}],
-                 "label": "▶️ Play ψₛ Resonance", "method": "animate"},
-                {"args": [[None], {"frame": {"duration": 0}, "mode": "immediate"}],
-                 "label": "⏸ Pause", "method": "animate"}
-            ],
-            "direction": "left", "pad": {"r": 10, "t": 70},
-            "showactive": False, "type": "buttons", "x": 0.1, "xanchor": "right", "y": 1.05, "yanchor": "top"
-        }]
-    )
+    fig.frames = _resonance_frames(psi_s)
+    fig.update_layout(updatemenus=[RESONANCE_CONTROLS])
 
     # === Add KP gauge ===
     fig.add_trace(go.Indicator(
@@ -123,12 +385,7 @@ def build_dashboard():
         value=kp,
         title={"text": "Geomagnetic Kp Index"},
         domain={"x": [0, 0.4], "y": [0, 0.25]},
-        gauge={"axis": {"range": [0, 9]},
-               "bar": {"color": "gold"},
-               "steps": [
-                   {"range": [0, 3], "color": "darkblue"},
-                   {"range": [3, 6], "color": "orange"},
-                   {"range": [6, 9], "color": "red"}]}
+        gauge=KP_GAUGE
     ))
 
     return fig
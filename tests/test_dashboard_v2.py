@@ -0,0 +1,188 @@
+import io
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("requests")
+
+from supt_dashboard import dashboard_v2 as dv2
+
+INGV_TEXT = (
+    "#EventID|Time|Latitude|Longitude|Depth/Km|Author|Catalog|Contributor|ContributorID"
+    "|MagType|Magnitude|MagAuthor|EventLocationName|EventType\n"
+    "1|2026-10-15T10:00:00.000000|40.82|14.12|2.1|SURVEY||||Md|1.2|--|Campi Flegrei|earthquake\n"
+    "2|2026-10-15T11:00:00.000000|40.81|14.13|4.0|SURVEY||||Md|0.8|--|Campi Flegrei|earthquake\n"
+).encode()
+KP_JSON = b'[["time_tag","Kp","a_running","station_count"],["2026-10-15 09:00:00.000","6.33","80","8"]]'
+
+
+class FakeResponse:
+    def __init__(self, content=b"", status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.raw = io.BytesIO(content)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise dv2.requests.HTTPError(f"{self.status_code} error")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path):
+    """Route SESSION.get to canned responses and isolate every cache layer."""
+    responses = {}
+
+    def get(url, **kwargs):
+        for prefix, make in responses.items():
+            if url.startswith(prefix):
+                return make(url, **kwargs)
+        raise AssertionError(f"unexpected request: {url}")
+
+    monkeypatch.setattr(dv2.SESSION, "get", get)
+    monkeypatch.setattr(dv2, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(dv2, "BREAKER", dv2.CircuitBreaker())
+    for table in (dv2._CACHE, dv2._REFRESHING, dv2._VALIDATORS, dv2._INFLIGHT):
+        table.clear()
+    return responses
+
+
+def test_fetch_kp_through_decorator_stack(session):
+    session["https://services.swpc.noaa.gov/"] = lambda url, **kw: FakeResponse(KP_JSON)
+    assert dv2.fetch_kp() == pytest.approx(6.33)
+
+
+def test_fetch_ingv_through_decorator_stack(session):
+    session["https://webservices.ingv.it/"] = lambda url, **kw: FakeResponse(INGV_TEXT)
+    df = dv2.fetch_ingv(40.79, 40.84, 14.10, 14.15)
+    assert list(df.columns) == ["time", "latitude", "longitude", "depth", "md"]
+    assert len(df) == 2
+    assert str(df["depth"].dtype) == "float32"
+
+
+def test_failed_fetch_is_not_cached(session):
+    def timeout(url, **kw):
+        raise dv2.requests.Timeout("read timed out")
+
+    session["https://services.swpc.noaa.gov/"] = timeout
+    assert dv2.fetch_kp() == 3.0
+    session["https://services.swpc.noaa.gov/"] = lambda url, **kw: FakeResponse(KP_JSON)
+    assert dv2.fetch_kp() == pytest.approx(6.33)
+
+
+def test_background_refresh_failure_keeps_old_value(session, monkeypatch):
+    session["https://services.swpc.noaa.gov/"] = lambda url, **kw: FakeResponse(KP_JSON)
+    assert dv2.fetch_kp() == pytest.approx(6.33)
+
+    def timeout(url, **kw):
+        raise dv2.requests.Timeout("read timed out")
+
+    session["https://services.swpc.noaa.gov/"] = timeout
+    key = ("_fetch_kp", ())
+    value, fetched_at = dv2._CACHE[key]
+    dv2._CACHE[key] = (value, fetched_at - 4 * 3600)  # past ttl, within stale_ttl
+    assert dv2.fetch_kp() == pytest.approx(6.33)
+    lock = dv2._REFRESHING[key]
+    with lock:  # acquired once the background refresh has finished
+        pass
+    assert dv2._CACHE[key][0] == pytest.approx(6.33)
+
+
+def test_ingv_frame_is_reused_from_disk(session, tmp_path):
+    session["https://webservices.ingv.it/"] = lambda url, **kw: FakeResponse(INGV_TEXT)
+    dv2.fetch_ingv(38.38, 38.47, 14.90, 15.05)
+    assert [p.suffix for p in tmp_path.iterdir()] == [".parquet"]  # no temp file left behind
+    dv2._CACHE.clear()
+    del session["https://webservices.ingv.it/"]  # a network call would now fail the test
+    assert len(dv2.fetch_ingv(38.38, 38.47, 14.90, 15.05)) == 2
+
+
+def test_breaker_windows_grow_per_failed_probe(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(dv2.time, "time", lambda: clock[0])
+    breaker = dv2.CircuitBreaker()
+    for _ in range(3):
+        assert breaker.allow("h")
+        breaker.record("h", ok=False)
+    for window in (120, 600, 1800, 1800):
+        clock[0] += window - 1
+        assert not breaker.allow("h")
+        clock[0] += 1
+        assert breaker.allow("h")  # half-open probe
+        breaker.record("h", ok=False)
+    clock[0] += 1800
+    assert breaker.allow("h")
+    breaker.record("h", ok=True)
+    assert breaker.allow("h") and breaker.allow("h")
+
+
+def test_breaker_admits_one_half_open_probe(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(dv2.time, "time", lambda: clock[0])
+    breaker = dv2.CircuitBreaker()
+    for _ in range(3):
+        breaker.record("h", ok=False)
+    breaker.record("h", ok=False)  # late failure while open: no re-trip
+    assert breaker.trips["h"] == 1 and breaker.open_until["h"] == 1120.0
+    clock[0] += 120
+    assert breaker.allow("h")
+    assert not breaker.allow("h")  # probe still in flight
+    breaker.record("h", ok=True)
+    assert breaker.allow("h")
+
+
+def test_error_response_is_closed(session):
+    response = FakeResponse(status_code=503)
+    session["https://services.swpc.noaa.gov/"] = lambda url, **kw: response
+    assert dv2.fetch_kp() == 3.0
+    assert response.closed
+
+
+def _age_snapshot(tmp_path, seconds):
+    import os
+    import time
+
+    (path,) = tmp_path.glob("_fetch_ingv-*.parquet")
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_ingv_no_events_is_empty_not_stale(session, tmp_path):
+    session["https://webservices.ingv.it/"] = lambda url, **kw: FakeResponse(INGV_TEXT)
+    assert len(dv2.fetch_ingv(38.38, 38.47, 14.90, 15.05)) == 2
+    dv2._CACHE.clear()
+    _age_snapshot(tmp_path, 3600)
+    session["https://webservices.ingv.it/"] = lambda url, **kw: FakeResponse(status_code=204)
+    assert len(dv2.fetch_ingv(38.38, 38.47, 14.90, 15.05)) == 0
+
+
+def test_ingv_failure_serves_snapshot_within_window_only(session, tmp_path):
+    session["https://webservices.ingv.it/"] = lambda url, **kw: FakeResponse(INGV_TEXT)
+    dv2.fetch_ingv(38.38, 38.47, 14.90, 15.05)
+    session["https://webservices.ingv.it/"] = lambda url, **kw: FakeResponse(status_code=503)
+
+    dv2._CACHE.clear()
+    _age_snapshot(tmp_path, 3600)
+    assert len(dv2.fetch_ingv(38.38, 38.47, 14.90, 15.05)) == 2
+
+    dv2._CACHE.clear()
+    _age_snapshot(tmp_path, 8 * 86400)
+    assert len(dv2.fetch_ingv(38.38, 38.47, 14.90, 15.05)) == 0
+
+
+def test_session_does_not_retry_read_timeouts():
+    retry = dv2.SESSION.get_adapter("https://").max_retries
+    assert retry.read == 0
+    assert retry.connect == 2 and retry.status == 2
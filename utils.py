@@ -1,10 +1,16 @@
+import functools
 import numpy as np
 from scipy.signal import find_peaks, butter, filtfilt
 
-def low_pass_filter(data, cutoff=0.1, fs=1.0, order=3):
+@functools.lru_cache(maxsize=8)
+def _butter_lowpass(cutoff, fs, order):
+    # Filter design depends only on these scalars; compute the coefficients once
     nyq = 0.5 * fs
     normal_cutoff = cutoff / nyq
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
+    return butter(order, normal_cutoff, btype='low', analog=False)
+
+def low_pass_filter(data, cutoff=0.1, fs=1.0, order=3):
+    b, a = _butter_lowpass(cutoff, fs, order)
     return filtfilt(b, a, data)
 
 def check_critical_triplet(signal, station_dists=[600], time_int=20):